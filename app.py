@@ -6,6 +6,8 @@ Streamlitベースのメインアプリケーション。
 サイドバーでの設定管理と、メイン画面でのRAG Q&Aインターフェースを提供します。
 """
 
+from itertools import islice
+from typing import Iterator
 import streamlit as st
 from config import (
     AVAILABLE_MODELS,
@@ -18,9 +20,14 @@ from data_loader import (
     load_pdf,
     load_web,
     get_document_summary,
+    compute_source_hash,
 )
 from vectorizer import (
-    create_collection,
+    ENCODE_BATCH_SIZE,
+    add_chunks,
+    prune_collection,
+    mark_ingested,
+    get_ingested_summary,
     get_collection_info,
     delete_collection,
     collection_exists,
@@ -173,18 +180,19 @@ def render_sidebar() -> tuple[str, str]:
         )
         
         # URL入力
-        url_input = st.text_input(
+        url_input = st.text_area(
             "WebサイトのURL",
             placeholder="https://example.com/article",
-            help="Webページからテキストを抽出します",
+            help="Webページからテキストを抽出します（複数の場合は1行に1つ）",
         )
+        urls = [line.strip() for line in url_input.splitlines() if line.strip()]
 
         # ロードボタン
         if st.button("? ドキュメントをロード", use_container_width=True, type="primary"):
-            if not uploaded_files and not url_input:
+            if not uploaded_files and not urls:
                 st.error("PDFまたはURLを入力してください")
             else:
-                load_documents(uploaded_files, url_input)
+                load_documents(uploaded_files, urls)
 
         # 現在のドキュメント情報
         if st.session_state.documents_loaded:
@@ -216,43 +224,119 @@ def render_sidebar() -> tuple[str, str]:
 # ==============================================================================
 # ドキュメント管理
 # ==============================================================================
-def load_documents(uploaded_files: list, url_input: str) -> None:
+def load_documents(uploaded_files: list, urls: list[str]) -> None:
     """
     ドキュメントをロードしてベクトル化する。
+    チャンクはENCODE_BATCH_SIZE件ずつ読み込み・ベクトル化・登録し、
+    全チャンクを一度にメモリへ保持しない。
+    コレクションはロードをまたいで保持し、登録済みのチャンクは再ベクトル化しない。
+    直前のロードと同じPDFのみの入力の場合は、保存済みのコレクションをそのまま再利用する。
+    （URLを含む場合はページ内容が更新されている可能性があるため、毎回取得する）
     Args:
         uploaded_files: アップロードされたPDFファイルのリスト
-        url_input: WebサイトのURL
+        urls: WebサイトのURLのリスト
     """
-    all_chunks = []
+    content_hash = None
+    if not urls:
+        content_hash = compute_source_hash([(f.name, f.getvalue()) for f in uploaded_files])
+    cached_summary = get_ingested_summary(content_hash) if content_hash else None
+    if cached_summary:
+        st.session_state.documents_loaded = True
+        st.session_state.document_summary = cached_summary
+        st.sidebar.success("? 同じドキュメントはベクトル化済みのため再利用しました")
+        return
+
+    summary = None
+    added_count = 0
+    loaded_ids: set[str] = set()
+    failed_sources: list[str] = []
     with st.spinner("ドキュメントを処理中..."):
-        # PDFの処理
-        for uploaded_file in uploaded_files:
-            try:
-                file_bytes = uploaded_file.read()
-                chunks = load_pdf(file_bytes, uploaded_file.name)
-                all_chunks.extend(chunks)
-                st.sidebar.success(f"? {uploaded_file.name} を読み込みました")
-            except Exception as e:
+        try:
+            chunk_stream = iter_source_chunks(uploaded_files, urls, failed_sources)
+            batch = list(islice(chunk_stream, ENCODE_BATCH_SIZE))
+            # 1件も読み込めなかった場合は、既存のコレクションをそのまま残す
+            if not batch:
+                st.sidebar.error("? 読み込めるテキストがありませんでした（既存のドキュメントは保持されます）")
+                return
+            
+            while batch:
+                batch_ids, added = add_chunks(batch)
+                added_count += added
+                # 今回のロード内で重複するチャンクはサマリーに数えない
+                new_chunks = []
+                for chunk, chunk_id in zip(batch, batch_ids):
+                    if chunk_id not in loaded_ids:
+                        loaded_ids.add(chunk_id)
+                        new_chunks.append(chunk)
+                summary = get_document_summary(new_chunks, summary)
+                batch = list(islice(chunk_stream, ENCODE_BATCH_SIZE))
+            # 今回の入力に含まれない（以前のロードで登録された）チャンクを削除
+            prune_collection(loaded_ids)
+            # 読み込みに失敗したソースがある場合は、次回も再処理させるため記録しない
+            if summary and content_hash and not failed_sources:
+                mark_ingested(content_hash, summary)
+        except Exception as e:
+            st.sidebar.error(f"? ベクトル化エラー: {str(e)}")
+            summary = None
+
+        # コレクションは更新済みのため、状態を更新する
+        st.session_state.documents_loaded = summary is not None
+        st.session_state.document_summary = summary
+        if summary:
+            st.sidebar.success(
+                f"? {summary['total_chunks']}チャンクを登録しました"
+                f"（うち新規にベクトル化: {added_count}チャンク）"
+            )
+
+def iter_source_chunks(
+    uploaded_files: list,
+    urls: list[str],
+    failed_sources: list[str],
+) -> Iterator[dict]:
+    """
+    各ソースのチャンクを順に生成する。読み込みに失敗したソースはエラーを表示して次へ進む。
+    Args:
+        uploaded_files: アップロードされたPDFファイルのリスト
+        urls: WebサイトのURLのリスト
+        failed_sources: 読み込みに失敗したソース名を追記するリスト
+    Yields:
+        dict: チャンクの辞書
+    """
+    # PDFの処理
+    for uploaded_file in uploaded_files:
+        yielded_count = 0
+        try:
+            file_bytes = uploaded_file.getvalue()
+            for chunk in load_pdf(file_bytes, uploaded_file.name):
+                yielded_count += 1
+                yield chunk
+            st.sidebar.success(f"? {uploaded_file.name} を読み込みました")
+        except Exception as e:
+            # 途中のページまでのチャンクは登録済みのため、部分的な読み込みであることを伝える
+            if yielded_count:
+                st.sidebar.warning(
+                    f"?? {uploaded_file.name}: 途中でエラーが発生したため、"
+                    f"先頭の{yielded_count}チャンクのみ読み込みました（{str(e)}）"
+                )
+            else:
                 st.sidebar.error(f"? {uploaded_file.name}: {str(e)}")
-        
-        # Webページの処理
-        if url_input:
-            try:
-                chunks = load_web(url_input)
-                all_chunks.extend(chunks)
-                st.sidebar.success(f"? {url_input} を読み込みました")
-            except Exception as e:
-                st.sidebar.error(f"? URL読み込みエラー: {str(e)}")
-        
-        # ベクトル化
-        if all_chunks:
-            try:
-                create_collection(all_chunks)
-                st.session_state.documents_loaded = True
-                st.session_state.document_summary = get_document_summary(all_chunks)
-                st.sidebar.success(f"? {len(all_chunks)}チャンクをベクトル化しました")
-            except Exception as e:
-                st.sidebar.error(f"? ベクトル化エラー: {str(e)}")
+            failed_sources.append(uploaded_file.name)
+
+    # Webページの処理（全URLを並行して取得）
+    if urls:
+        try:
+            web_results = load_web(urls)
+        except Exception as e:
+            st.sidebar.error(f"? URL読み込みエラー: {str(e)}")
+            failed_sources.extend(urls)
+            web_results = []
+        for url, result in web_results:
+            if isinstance(result, Exception):
+                st.sidebar.error(f"? URL読み込みエラー: {url}: {str(result)}")
+                failed_sources.append(url)
+                continue
+            yield from result
+            st.sidebar.success(f"? {url} を読み込みました")
 
 def clear_documents() -> None:
     """ロード済みドキュメントをクリアする。"""
@@ -323,42 +407,74 @@ def render_main(api_key: str, model_name: str) -> None:
                     query=prompt,
                     api_key=api_key,
                     model_name=model_name,
+                    stream=True,
                 )
-                st.markdown(result["answer"])
-                
-                # 根拠テキストの表示
-                if result["sources"]:
-                    render_sources(result["sources"])
-                
-                # メッセージ履歴に追加
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": result["answer"],
-                    "sources": result["sources"],
-                })
+            # 生成されたテキストを順次表示し、全文を受け取る
+            answer = st.write_stream(result["answer"])
+            
+            # 根拠テキストの表示（表示用の値は一度だけ計算して履歴にも保存）
+            sources = prepare_sources(result["sources"])
+            if sources:
+                render_sources(sources)
+            
+            # メッセージ履歴に追加
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": answer,
+                "sources": sources,
+            })
+
+def score_color(score: float) -> str:
+    """
+    関連度スコアに応じたバッジの色を返す。
+    Args:
+        score: 関連度スコア（0〜1）
+    Returns:
+        str: カラーコード
+    """
+    return "#22c55e" if score >= 0.7 else "#eab308" if score >= 0.5 else "#ef4444"
+
+def prepare_sources(sources: list[dict]) -> list[dict]:
+    """
+    ソース情報を表示用に整形する。
+    Streamlitは操作のたびにスクリプト全体を再実行するため、
+    抜粋テキストやバッジ色は回答時に一度だけ計算して履歴に保存する。
+    Args:
+        sources: generate_answerが返すソース情報のリスト
+    Returns:
+        list[dict]: {"source": 出典, "score": 関連度, "text_preview": 抜粋テキスト, "color": バッジ色}
+    """
+    prepared = []
+    for source in sources:
+        score = source.get("score", 0)
+        prepared.append({
+            "source": source.get("source", "不明"),
+            "score": score,
+            "text_preview": source.get("text", "")[:500],
+            "color": score_color(score),
+        })
+    return prepared
 
 def render_sources(sources: list[dict]) -> None:
     """
     参照した根拠テキストを表示する。
     Args:
-        sources: ソース情報のリスト
+        sources: prepare_sourcesで整形済みのソース情報のリスト
     """
     if not sources:
         return
         
     with st.expander("? 根拠となったテキスト（Source Context）", expanded=False):
         for i, source in enumerate(sources, start=1):
-            score = source.get("score", 0)
-            score_color = "#22c55e" if score >= 0.7 else "#eab308" if score >= 0.5 else "#ef4444"
             st.markdown(f"""
             <div class="source-card">
                 <strong>資料{i}</strong>
-                <span style="background: {score_color}; color: white; padding: 0.2rem 0.5rem; border-radius: 1rem; font-size: 0.75rem; margin-left: 0.5rem;">
-                    関連度: {score:.0%}
+                <span style="background: {source["color"]}; color: white; padding: 0.2rem 0.5rem; border-radius: 1rem; font-size: 0.75rem; margin-left: 0.5rem;">
+                    関連度: {source["score"]:.0%}
                 </span>
                 <br>
-                <small style="color: #718096;">出典: {source.get("source", "不明")}</small>
-                <p style="margin-top: 0.5rem; color: #2d3748;">{source.get("text", "")[:500]}...</p>
+                <small style="color: #718096;">出典: {source["source"]}</small>
+                <p style="margin-top: 0.5rem; color: #2d3748;">{source["text_preview"]}...</p>
             </div>
             """, unsafe_allow_html=True)
 
@@ -37,6 +37,14 @@ DEFAULT_TOP_K: int = 5
 CHUNK_SIZE: int = 500
 CHUNK_OVERLAP: int = 50
 
+# PDFのページ抽出を並列化する最小ページ数（これ未満は逐次処理）
+# 逐次抽出は1ページ約2ms、ワーカー1つの起動（spawn、モジュール再import込み）は約0.5秒のため、
+# 起動コストを上回る効果が見込めるページ数とする
+PDF_PARALLEL_MIN_PAGES: int = 500
+
+# PDFのページ抽出に使う最大プロセス数（各プロセスにPDF全体のコピーが渡る）
+PDF_PARALLEL_MAX_WORKERS: int = 4
+
 
 # ==============================================================================
 # APIキー管理関数（st.secrets対応）
@@ -6,123 +6,257 @@
 各関数は型ヒント付きで、独立してテスト可能な設計です。
 """
 
+import asyncio
+import hashlib
+import multiprocessing
+import os
 import re
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, Optional, Union
 import fitz  # PyMuPDF
-import requests
+import httpx
 from bs4 import BeautifulSoup
 
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+from config import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    PDF_PARALLEL_MAX_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+)
+
+# PDFテキスト抽出フラグ
+# 合字の保持をやめて通常文字に展開し、行末ハイフンで分割された単語を結合する。
+# 画像情報は抽出しない（TEXTFLAGS_TEXTに含まれない）。
+_PDF_TEXT_FLAGS: int = (
+    (fitz.TEXTFLAGS_TEXT | fitz.TEXT_DEHYPHENATE) & ~fitz.TEXT_PRESERVE_LIGATURES
+)
+
+# Webページ取得時のリクエストヘッダー（User-Agentを設定してブロック回避）
+_WEB_HEADERS: dict[str, str] = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# テキスト処理用の正規表現（モジュール読み込み時に一度だけコンパイル）
+_SENT_RE = re.compile(r'(?<=[。．！？\n])')  # 句読点・改行の直後で文を分割
+_WS_RE = re.compile(r'[^\S\n]+')           # 改行以外の連続する空白
+_NL_RE = re.compile(r'\n+')                # 連続する改行
 
 
 # ==============================================================================
 # PDF処理
 # ==============================================================================
 
-def load_pdf(file_bytes: bytes, filename: str = "uploaded.pdf") -> list[dict[str, str]]:
+def load_pdf(file_bytes: bytes, filename: str = "uploaded.pdf") -> Iterator[dict[str, str]]:
     """
-    PDFファイルからテキストを抽出し、ページ単位のチャンクリストを返す。
+    PDFファイルからテキストを抽出し、ページ単位でチャンクを順に生成する。
+    ページごとに分割して逐次返すため、ドキュメント全体のチャンクを一度に保持しない。
     
     Args:
         file_bytes: PDFファイルのバイトデータ
         filename: ファイル名（ソース情報として使用）
         
-    Returns:
-        list[dict]: 各チャンクの辞書リスト
-                   {"text": 抽出テキスト, "source": ソース情報, "page": ページ番号}
+    Yields:
+        dict: 各チャンクの辞書
+              {"text": 抽出テキスト, "source": ソース情報, "page": ページ番号}
     """
-    chunks: list[dict[str, str]] = []
-    
     try:
-        # PyMuPDFでPDFを開く（バイトデータから）
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        
-        for page_num, page in enumerate(doc, start=1):
-            text = page.get_text("text")
-            
+        for page_num, text in enumerate(_iter_page_texts(file_bytes), start=1):
             # 空白ページはスキップ
             if not text.strip():
                 continue
             
             # テキストをチャンクに分割
-            page_chunks = split_text_into_chunks(text)
-            
-            for chunk in page_chunks:
-                chunks.append({
+            for chunk in split_text_into_chunks(text):
+                yield {
                     "text": chunk,
                     "source": f"{filename} - ページ {page_num}",
                     "page": str(page_num),
-                })
-        
-        doc.close()
+                }
         
     except Exception as e:
         raise ValueError(f"PDF読み込みエラー: {str(e)}")
+
+
+def _iter_page_texts(file_bytes: bytes) -> Iterator[str]:
+    """
+    PDFの各ページのテキストをページ順に生成する。
+    ページ数が多く複数CPUが使える場合は、複数プロセスで並列に抽出する。
     
-    return chunks
+    Args:
+        file_bytes: PDFファイルのバイトデータ
+        
+    Yields:
+        str: 各ページのテキスト
+    """
+    # PyMuPDFでPDFを開く（バイトデータから）
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        page_count = len(doc)
+        if page_count < PDF_PARALLEL_MIN_PAGES or (os.cpu_count() or 1) < 2:
+            for page in doc:
+                yield page.get_text("text", flags=_PDF_TEXT_FLAGS)
+            return
+    
+    yield from _extract_page_texts_parallel(file_bytes, page_count)
+
+
+def _extract_page_texts(file_bytes: bytes, start: int, stop: int) -> list[str]:
+    """
+    PDFの指定ページ範囲からテキストを抽出する（ワーカープロセス用）。
+    
+    Args:
+        file_bytes: PDFファイルのバイトデータ
+        start: 開始ページのインデックス（0始まり）
+        stop: 終了ページのインデックス（この値は含まない）
+        
+    Returns:
+        list[str]: ページ順のテキストリスト
+    """
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        return [doc[i].get_text("text", flags=_PDF_TEXT_FLAGS) for i in range(start, stop)]
+
+
+def _extract_page_texts_parallel(file_bytes: bytes, page_count: int) -> Iterator[str]:
+    """
+    PDFの全ページのテキストを複数プロセスで並列に抽出する。
+    
+    PyMuPDFはスレッドセーフではなく抽出中もGILを保持するため、
+    ページ範囲ごとにプロセスを分け、各プロセスでドキュメントを開き直す。
+    Streamlitはスレッドを使うためforkは避け、全OSで同じ挙動になるよう
+    spawnでワーカーを起動する（各ワーカーは本モジュールとconfigを再importする）。
+    PDFのバイトデータは各ワーカーに1回ずつ渡るため、プロセス数は
+    PDF_PARALLEL_MAX_WORKERS で抑える。
+    
+    Args:
+        file_bytes: PDFファイルのバイトデータ
+        page_count: 総ページ数
+        
+    Yields:
+        str: 各ページのテキスト（ページ順）
+    """
+    workers = min(PDF_PARALLEL_MAX_WORKERS, os.cpu_count() or 1, page_count)
+    step = -(-page_count // workers)  # 切り上げ除算
+    starts = list(range(0, page_count, step))
+    stops = [min(start + step, page_count) for start in starts]
+    
+    # mapは入力順に結果を返すため、ページ順が保たれる
+    with ProcessPoolExecutor(
+        max_workers=len(starts),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        parts = executor.map(_extract_page_texts, repeat(file_bytes), starts, stops)
+        for part in parts:
+            yield from part
 
 
 # ==============================================================================
 # Web スクレイピング
 # ==============================================================================
 
-def load_web(url: str, timeout: int = 10) -> list[dict[str, str]]:
+def load_web(
+    urls: list[str],
+    timeout: int = 10
+) -> list[tuple[str, Union[list[dict[str, str]], ValueError]]]:
     """
-    WebページからテキストをスクレイピングしてチャンクリストReturns:を返す。
+    複数のWebページを並行して取得し、それぞれのテキストをチャンクリストにして返す。
     
     Args:
-        url: 対象のURL
+        urls: 対象のURLのリスト
         timeout: リクエストタイムアウト秒数
         
     Returns:
-        list[dict]: 各チャンクの辞書リスト
-                   {"text": 抽出テキスト, "source": URL}
+        list[tuple]: 入力順の (URL, 結果) のリスト。
+                     結果は各チャンクの辞書リスト {"text": 抽出テキスト, "source": URL}、
+                     取得・解析に失敗した場合はValueError。
     """
-    chunks: list[dict[str, str]] = []
+    # 取得はI/O待ちが主なため、全URLを同時にリクエストする
+    responses = asyncio.run(_fetch_all(urls, timeout))
     
-    try:
-        # HTTPリクエスト（User-Agentを設定してブロック回避）
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        response.encoding = response.apparent_encoding
-        
-        # BeautifulSoupで解析
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # 不要なタグを除去（script, style, nav, footer等）
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            tag.decompose()
-        
-        # 本文テキストを抽出
-        # 優先度: article > main > body
-        main_content = soup.find("article") or soup.find("main") or soup.find("body")
-        
-        if main_content:
-            text = main_content.get_text(separator="
-", strip=True)
+    results: list[tuple[str, Union[list[dict[str, str]], ValueError]]] = []
+    for url, response in zip(urls, responses):
+        if isinstance(response, Exception):
+            results.append((url, ValueError(f"Web読み込みエラー: {str(response)}")))
+        elif isinstance(response, BaseException):
+            # キャンセル等はURL単位のエラーとして扱わない
+            raise response
         else:
-            text = soup.get_text(separator="
-", strip=True)
+            try:
+                results.append((
+                    url,
+                    _parse_web_page(url, response.content, response.charset_encoding),
+                ))
+            except Exception as e:
+                results.append((url, ValueError(f"Web解析エラー: {str(e)}")))
+    
+    return results
+
+
+async def _fetch_all(urls: list[str], timeout: int) -> list:
+    """
+    複数のURLを非同期に並行して取得する。
+    
+    Args:
+        urls: 対象のURLのリスト
+        timeout: リクエストタイムアウト秒数
         
-        # テキストをクリーンアップ
-        text = clean_text(text)
+    Returns:
+        list: 入力順のhttpx.Response、または失敗時の例外
+    """
+    async with httpx.AsyncClient(
+        headers=_WEB_HEADERS, timeout=timeout, follow_redirects=True
+    ) as client:
         
-        # チャンクに分割
-        text_chunks = split_text_into_chunks(text)
+        async def fetch(url: str) -> httpx.Response:
+            response = await client.get(url)
+            response.raise_for_status()
+            return response
         
-        for chunk in text_chunks:
-            chunks.append({
-                "text": chunk,
-                "source": url,
-            })
-            
-    except requests.RequestException as e:
-        raise ValueError(f"Web読み込みエラー: {str(e)}")
+        return await asyncio.gather(*(fetch(url) for url in urls), return_exceptions=True)
+
+
+def _parse_web_page(
+    url: str,
+    content: bytes,
+    encoding: Optional[str] = None
+) -> list[dict[str, str]]:
+    """
+    取得したHTMLから本文テキストを抽出し、チャンクリストを返す。
     
-    return chunks
+    Args:
+        url: ページのURL（ソース情報として使用）
+        content: レスポンス本文のバイトデータ
+        encoding: Content-Typeヘッダーで指定された文字コード（指定がない場合はNone）
+        
+    Returns:
+        list[dict]: 各チャンクの辞書リスト
+                   {"text": 抽出テキスト, "source": URL}
+    """
+    # BeautifulSoupで解析（C実装のlxmlパーサーを使用）
+    # ヘッダーの文字コードを優先し、指定がなければmetaタグ等からパーサー側で判定させる
+    # （metaタグのないShift_JIS・EUC-JPのページが文字化けしないようにする）
+    soup = BeautifulSoup(content, "lxml", from_encoding=encoding)
+    
+    # 不要なタグを除去（script, style, nav, footer等）
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.decompose()
+    
+    # 本文テキストを抽出
+    # 優先度: article > main > body
+    main_content = soup.find("article") or soup.find("main") or soup.find("body")
+    
+    if main_content:
+        text = main_content.get_text(separator="\n", strip=True)
+    else:
+        text = soup.get_text(separator="\n", strip=True)
+    
+    # テキストをクリーンアップ
+    text = clean_text(text)
+    
+    # チャンクに分割
+    return [
+        {"text": chunk, "source": url}
+        for chunk in split_text_into_chunks(text)
+    ]
 
 
 # ==============================================================================
@@ -150,8 +284,7 @@ def split_text_into_chunks(
         return []
     
     # 句読点または改行で文を分割
-    sentences = re.split(r'(?<=[。．！？
-])', text)
+    sentences = _SENT_RE.split(text)
     sentences = [s.strip() for s in sentences if s.strip()]
     
     chunks: list[str] = []
@@ -163,10 +296,11 @@ def split_text_into_chunks(
         
         # チャンクサイズを超える場合は現在のチャンクを確定
         if current_length + sentence_length > chunk_size and current_chunk:
-            chunks.append("".join(current_chunk))
+            chunk_text = "".join(current_chunk)
+            chunks.append(chunk_text)
             
-            # オーバーラップを考慮して次のチャンクを開始
-            overlap_text = "".join(current_chunk)[-overlap:] if overlap > 0 else ""
+            # オーバーラップを考慮して次のチャンクを開始（確定済みの文字列を再利用）
+            overlap_text = chunk_text[-overlap:] if overlap > 0 else ""
             current_chunk = [overlap_text] if overlap_text else []
             current_length = len(overlap_text)
         
@@ -190,38 +324,61 @@ def clean_text(text: str) -> str:
     Returns:
         str: クリーンアップ済みテキスト
     """
-    # 連続する空白を1つに
-    text = re.sub(r's+', ' ', text)
+    # 連続する空白を1つに（改行は文の区切りとして残す）
+    text = _WS_RE.sub(' ', text)
     # 連続する改行を1つに
-    text = re.sub(r'
-+', '
-', text)
+    text = _NL_RE.sub('\n', text)
     # 前後の空白を除去
     text = text.strip()
     
     return text
 
 
-def get_document_summary(chunks: list[dict[str, str]]) -> dict[str, any]:
+def get_document_summary(
+    chunks: list[dict[str, str]],
+    summary: Optional[dict[str, any]] = None
+) -> dict[str, any]:
     """
     ドキュメントのサマリー情報を生成する。
+    チャンクをバッチ単位で処理する場合は、前回までのサマリーを渡して加算できる。
     
     Args:
         chunks: チャンクのリスト
+        summary: 加算元のサマリー情報（省略時は新規作成）
         
     Returns:
         dict: サマリー情報
               {"total_chunks": チャンク数, "total_chars": 総文字数, "sources": ソース一覧}
     """
-    sources = set()
-    total_chars = 0
+    sources = set(summary["sources"]) if summary else set()
+    total_chars = summary["total_chars"] if summary else 0
+    total_chunks = summary["total_chunks"] if summary else 0
     
     for chunk in chunks:
         sources.add(chunk.get("source", "不明"))
         total_chars += len(chunk.get("text", ""))
     
     return {
-        "total_chunks": len(chunks),
+        "total_chunks": total_chunks + len(chunks),
         "total_chars": total_chars,
         "sources": list(sources),
     }
+
+
+def compute_source_hash(files: list[tuple[str, bytes]]) -> str:
+    """
+    入力ドキュメント（ファイル名と内容）全体を表すハッシュ値を計算する。
+    同じ入力が再度ロードされたかの判定に使用する。
+    Webページは取得するまで内容が分からないため対象外とする。
+    
+    Args:
+        files: (ファイル名, バイトデータ) のリスト
+        
+    Returns:
+        str: 16桁の16進ハッシュ文字列
+    """
+    hasher = hashlib.sha256()
+    for filename, file_bytes in files:
+        hasher.update(filename.encode("utf-8") + b"\0")
+        hasher.update(hashlib.sha256(file_bytes).digest())
+    return hasher.hexdigest()[:16]
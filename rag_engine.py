@@ -6,10 +6,34 @@
 ベクトルデータベースからの関連コンテキスト取得を担当します。
 """
 
+import functools
+import threading
+from typing import Iterator
 import google.generativeai as genai
+from google.generativeai import client as genai_client
 from vectorizer import query_collection
 from config import AVAILABLE_MODELS, DEFAULT_MODEL, DEFAULT_TOP_K
 
+# 回答生成用プロンプトのテンプレート（{context}: 参考資料, {query}: ユーザーの質問）
+_PROMPT_TEMPLATE: str = """
+あなたは誠実で優秀なAIアシスタント「AIナレッジ・コンシェルジュ」です。
+提供された「参考資料」の内容のみに基づいて、ユーザーの質問に正確に答えてください。
+
+【制約事項】
+・資料に記載がない場合は「提供された資料にはその情報が含まれていません」とはっきり伝えてください。
+・推測で答えないでください。
+・回答は簡潔かつ丁寧な日本語で行ってください。
+・専門用語は必要に応じて分かりやすく解説してください。
+
+【参考資料】
+{context}
+
+【ユーザーの質問】
+{query}
+
+【回答】
+"""
+
 
 # ==============================================================================
 # 回答生成メイン関数
@@ -19,7 +43,8 @@ def generate_answer(
     query: str,
     api_key: str,
     model_name: str = DEFAULT_MODEL,
-    top_k: int = DEFAULT_TOP_K
+    top_k: int = DEFAULT_TOP_K,
+    stream: bool = False
 ) -> dict:
     """
     ユーザーの質問に対して、保存された知識から回答を生成する。
@@ -29,9 +54,11 @@ def generate_answer(
         api_key: Gemini APIキー
         model_name: 使用するモデル名
         top_k: 検索する関連チャンク数
+        stream: Trueの場合、回答を生成された順に返すイテレータとして返す
         
     Returns:
-        dict: {"answer": 生成された回答, "sources": 参照したソース情報のリスト}
+        dict: {"answer": 生成された回答（stream=Trueの場合は文字列のイテレータ）,
+               "sources": 参照したソース情報のリスト}
     """
     # 1. ベクトルデータベースから関連情報を検索
     relevant_chunks = query_collection(query, n_results=top_k)
@@ -54,29 +81,18 @@ def generate_answer(
         context_text = "関連する資料が見つかりませんでした。一般的な知識に基づいて回答するか、資料が不足している旨を伝えてください。"
 
     # 3. Gemini APIへのプロンプト構築
-    prompt = f"""
-あなたは誠実で優秀なAIアシスタント「AIナレッジ・コンシェルジュ」です。
-提供された「参考資料」の内容のみに基づいて、ユーザーの質問に正確に答えてください。
-
-【制約事項】
-・資料に記載がない場合は「提供された資料にはその情報が含まれていません」とはっきり伝えてください。
-・推測で答えないでください。
-・回答は簡潔かつ丁寧な日本語で行ってください。
-・専門用語は必要に応じて分かりやすく解説してください。
-
-【参考資料】
-{context_text}
-
-【ユーザーの質問】
-{query}
-
-【回答】
-"""
+    prompt = _PROMPT_TEMPLATE.format(context=context_text, query=query)
 
     # 4. モデルの実行
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name)
+        model = _get_model(api_key, model_name)
+        if stream:
+            response = model.generate_content(prompt, stream=True)
+            return {
+                "answer": _iter_response_text(response),
+                "sources": sources
+            }
+        
         response = model.generate_content(prompt)
         
         return {
@@ -84,8 +100,9 @@ def generate_answer(
             "sources": sources
         }
     except Exception as e:
+        error_message = f"?? 回答生成中にエラーが発生しました: {str(e)}"
         return {
-            "answer": f"?? 回答生成中にエラーが発生しました: {str(e)}",
+            "answer": iter([error_message]) if stream else error_message,
             "sources": sources
         }
 
@@ -94,6 +111,50 @@ def generate_answer(
 # API 接続・ユーティリティ
 # ==============================================================================
 
+_CONFIGURE_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _get_model(api_key: str, model_name: str) -> genai.GenerativeModel:
+    """
+    APIキーとモデル名の組み合わせごとにGenerativeModelを生成し、使い回す。
+    genai.configure はプロセス全体の設定を書き換えるため、別セッションが
+    異なるAPIキーで同時に呼び出しても混ざらないよう、ロック内で設定し、
+    その時点のクライアントをモデルに固定する。
+    
+    Args:
+        api_key: Gemini APIキー
+        model_name: 使用するモデル名
+        
+    Returns:
+        genai.GenerativeModel: 生成モデル
+    """
+    with _CONFIGURE_LOCK:
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(model_name)
+        # GenerativeModel は初回生成時に既定クライアントを遅延取得するため、
+        # ここで明示的に束縛しておく（_client は SDK の非公開属性）
+        model._client = genai_client.get_default_generative_client()
+    return model
+
+
+def _iter_response_text(response) -> Iterator[str]:
+    """
+    ストリーミング応答からテキストを順に取り出す。
+    
+    Args:
+        response: generate_content(stream=True)の応答
+        
+    Yields:
+        str: 生成されたテキストの断片
+    """
+    try:
+        for chunk in response:
+            yield chunk.text
+    except Exception as e:
+        yield f"\n\n?? 回答生成中にエラーが発生しました: {str(e)}"
+
+
 def test_api_connection(api_key: str) -> tuple[bool, str]:
     """
     APIキーの有効性をテストする。
@@ -105,8 +166,7 @@ def test_api_connection(api_key: str) -> tuple[bool, str]:
         tuple[bool, str]: (成功したか, メッセージ)
     """
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(DEFAULT_MODEL)
+        model = _get_model(api_key, DEFAULT_MODEL)
         # 低コストなリクエストでテスト
         model.generate_content("Hi", generation_config={"max_output_tokens": 5})
         return True, "?? 接続テスト成功: Gemini APIは有効です。"
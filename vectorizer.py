@@ -0,0 +1,699 @@
+# ==============================================================================
+# vectorizer.py - ベクトル化・ベクトルDB管理モジュール
+# ==============================================================================
+"""
+このモジュールは、チャンクの埋め込みベクトル生成と、
+ChromaDBへの保存・検索・削除を担当します。
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from typing import Optional
+import chromadb
+import numpy as np
+import streamlit as st
+from sentence_transformers import SentenceTransformer
+
+from config import CHROMA_PERSIST_DIR, COLLECTION_NAME, EMBEDDING_MODEL
+
+# 埋め込み生成時のバッチサイズ
+ENCODE_BATCH_SIZE: int = 64
+
+# ベクトル検索の方式（チャンク数で切り替える）
+#   - HNSW_MIN_CHUNKS未満: 全埋め込みをint8に量子化してメモリに保持し、全件走査する。
+#     メモリはfloat32の1/4で、量子化誤差による順位の揺れはごく僅か（ほぼ厳密）。
+#   - HNSW_MIN_CHUNKS以上: メモリ上に行列を持たず、ChromaDBのHNSW索引で近似検索する。
+# どちらの場合も、表示する類似度は _fetch_chunks でfloat32の埋め込みから再計算する。
+
+# 検索時にint8行列をfloat32へ戻して計算する1ブロックあたりの行数
+SCORE_BLOCK_ROWS: int = 4096
+
+# このチャンク数以上のコレクションは全件走査をやめ、ChromaDBのHNSW索引で検索する
+# （384次元で5万件のint8行列は約19MB。float32なら約77MB）
+HNSW_MIN_CHUNKS: int = 50_000
+
+# ChromaDBのHNSW索引パラメータ
+HNSW_METADATA: dict[str, object] = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:M": 16,
+    "hnsw:search_ef": 50,
+}
+
+# 登録済みドキュメントの識別情報（入力ハッシュとサマリー）を保存するファイル
+INGEST_STATE_PATH: str = os.path.join(CHROMA_PERSIST_DIR, "ingest_state.json")
+
+# ハイブリッド検索で各検索方式から取得する候補数
+HYBRID_CANDIDATES: int = 20
+
+# Reciprocal Rank Fusionの順位補正定数
+RRF_K: int = 60
+
+# BM25のパラメータ（語頻度の飽和、文書長による正規化の強さ）
+BM25_K1: float = 1.5
+BM25_B: float = 0.75
+
+# BM25用トークン抽出（英数字の単語、またはそれ以外の連続する文字）
+_TOKEN_RE = re.compile(r'[a-z0-9]+|[^\W_a-z0-9]+')
+
+
+# ==============================================================================
+# クライアント・モデル取得
+# ==============================================================================
+
+@st.cache_resource
+def _get_client() -> chromadb.ClientAPI:
+    """
+    永続化ディレクトリを使用するChromaDBクライアントを取得する。
+    Streamlitの再実行をまたいでプロセス内で1つのインスタンスを使い回す。
+
+    Returns:
+        chromadb.ClientAPI: ChromaDBクライアント
+    """
+    return chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+
+
+@st.cache_resource
+def _get_embedder() -> SentenceTransformer:
+    """
+    埋め込みモデル（sentence-transformers）を取得する。
+    モデルの読み込みは数秒かかるため、プロセス内で1回だけ行う。
+
+    Returns:
+        SentenceTransformer: 埋め込みモデル
+    """
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+@st.cache_resource
+def _load_index() -> Optional[dict]:
+    """
+    コレクションの全埋め込みをメモリ上の検索用行列として読み込む。
+    Streamlitの再実行をまたいで保持し、コレクション更新時にクリアする。
+    本文・メタデータはメモリに保持せず、検索結果のIDからChromaDBで引く。
+
+    Returns:
+        Optional[dict]: {"ids": チャンクIDのリスト,
+                         "codes": (N, d) int8の量子化済み行列,
+                         "scales": (N,) float32の行ごとのスケール}。
+                        コレクションが存在しないか空の場合はNone。
+    """
+    try:
+        collection = _get_client().get_collection(COLLECTION_NAME)
+    except Exception:
+        return None
+
+    data = collection.get(include=["embeddings"])
+    if not data["ids"]:
+        return None
+
+    # 登録時に正規化済みのため、コサイン類似度は内積で求まる
+    codes, scales = _quantize(np.asarray(data["embeddings"], dtype=np.float32))
+
+    return {
+        "ids": data["ids"],
+        "codes": codes,
+        "scales": scales,
+    }
+
+
+@st.cache_resource
+def _load_bm25() -> Optional[dict]:
+    """
+    コレクションの全テキストからBM25索引を構築する。
+    Streamlitの再実行をまたいで保持し、コレクション更新時にクリアする。
+
+    Returns:
+        Optional[dict]: {"ids": チャンクIDのリスト, **_build_bm25の索引}。
+                        コレクションが存在しないか空の場合はNone。
+    """
+    try:
+        collection = _get_client().get_collection(COLLECTION_NAME)
+    except Exception:
+        return None
+
+    data = collection.get(include=["documents"])
+    if not data["ids"]:
+        return None
+
+    index = _build_bm25([_tokenize(text) for text in data["documents"]])
+    index["ids"] = data["ids"]
+    return index
+
+
+# ==============================================================================
+# ベクトル演算ユーティリティ
+# ==============================================================================
+
+def _quantize(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    埋め込み行列を行ごとのスケール付きint8に量子化する（メモリ使用量1/4）。
+
+    Args:
+        matrix: (N, d) float32の埋め込み行列
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: ((N, d) int8の量子化値, (N,) float32のスケール)
+    """
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    # ゼロベクトルの行で0除算しないようにする
+    scales[scales == 0] = 1.0
+    codes = np.round(matrix / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _score(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    量子化済み行列とクエリベクトルの内積を計算する。
+
+    NumPyの整数行列積はBLASを使わないため、ブロック単位でfloat32に戻して
+    BLASの行列ベクトル積で計算し、最後に行ごとのスケールを掛ける。
+    クエリは量子化せずfloat32のまま使う。
+
+    Args:
+        codes: (N, d) int8の量子化値
+        scales: (N,) float32のスケール
+        query: (d,) float32のクエリベクトル
+
+    Returns:
+        np.ndarray: (N,) float32の類似度スコア
+    """
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+        end = start + SCORE_BLOCK_ROWS
+        np.matmul(codes[start:end].astype(np.float32), query, out=scores[start:end])
+    scores *= scales
+    return scores
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    スコアの高い上位k件のインデックスを、スコアの高い順に取得する。
+
+    全件をソートせず、np.argpartitionでO(N)で上位k件を選んでから
+    そのk件のみをソートする。
+
+    Args:
+        scores: (N,) スコア配列
+        k: 取得する件数
+
+    Returns:
+        np.ndarray: 上位k件のインデックス（スコアの高い順）
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        # 全件を返す場合は選択不要
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top])]
+
+
+# ==============================================================================
+# BM25索引
+# ==============================================================================
+
+def _build_bm25(corpus: list[list[str]]) -> dict:
+    """
+    トークン化済みコーパスからBM25の転置索引を構築する。
+
+    チャンクごとの語頻度辞書は持たず、語ごとの出現チャンク番号と語頻度を
+    連続したNumPy配列（CSR形式）にまとめて保持する。
+
+    Args:
+        corpus: チャンクごとのトークンリスト
+
+    Returns:
+        dict: {"vocab": 語→語番号, "offsets": (V+1,) 語ごとの開始位置,
+               "doc_ids": 出現チャンク番号, "tfs": 語頻度,
+               "idf": (V,) 逆文書頻度, "norm": (N,) 文書長による正規化項}
+    """
+    vocab: dict[str, int] = {}
+    term_ids: list[int] = []
+    doc_ids: list[int] = []
+    tfs: list[int] = []
+    doc_lens = np.empty(len(corpus), dtype=np.float32)
+
+    for doc_id, tokens in enumerate(corpus):
+        doc_lens[doc_id] = len(tokens)
+        for token, tf in Counter(tokens).items():
+            term_ids.append(vocab.setdefault(token, len(vocab)))
+            doc_ids.append(doc_id)
+            tfs.append(tf)
+
+    # 語番号順に並べ替え、語ごとの出現箇所を連続区間にする
+    term_array = np.asarray(term_ids, dtype=np.int32)
+    order = np.argsort(term_array, kind="stable")
+    df = np.bincount(term_array, minlength=len(vocab))
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(df, out=offsets[1:])
+
+    n_docs = len(corpus)
+    avg_len = max(float(doc_lens.mean()), 1.0)
+
+    return {
+        "vocab": vocab,
+        "offsets": offsets,
+        "doc_ids": np.asarray(doc_ids, dtype=np.int32)[order],
+        "tfs": np.asarray(tfs, dtype=np.float32)[order],
+        # 常に正となるidf（全チャンクに出現する語も0以上）
+        "idf": np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0).astype(np.float32),
+        "norm": BM25_K1 * (1.0 - BM25_B + BM25_B * doc_lens / avg_len),
+    }
+
+
+def _bm25_scores(index: dict, query_tokens: list[str]) -> np.ndarray:
+    """
+    クエリトークンに対する全チャンクのBM25スコアを計算する。
+
+    Args:
+        index: _build_bm25で構築した索引
+        query_tokens: トークン化済みクエリ
+
+    Returns:
+        np.ndarray: (N,) float32のBM25スコア
+    """
+    scores = np.zeros(len(index["norm"]), dtype=np.float32)
+    for token in query_tokens:
+        term_id = index["vocab"].get(token)
+        if term_id is None:
+            continue
+        start, end = index["offsets"][term_id], index["offsets"][term_id + 1]
+        docs = index["doc_ids"][start:end]
+        tf = index["tfs"][start:end]
+        # 1つの語の出現チャンク番号は重複しないため、そのまま加算できる
+        scores[docs] += index["idf"][term_id] * tf * (BM25_K1 + 1.0) / (tf + index["norm"][docs])
+    return scores
+
+
+# ==============================================================================
+# コレクション作成・追加
+# ==============================================================================
+
+def add_chunks(chunks: list[dict[str, str]]) -> tuple[list[str], int]:
+    """
+    チャンクのバッチをベクトル化し、コレクションに追加する。
+    コレクションが存在しない場合は作成する。
+
+    バッチ内の全テキストを1回のencode呼び出しでまとめてベクトル化し、
+    ChromaDBへもまとめて登録する。
+    チャンクIDはテキストのハッシュ値とし、コレクションに登録済みのテキスト
+    （前回までのロードで登録されたものを含む）はベクトル化せず埋め込みを再利用する。
+    ただしソース名等のメタデータは今回の入力の値で更新する。
+
+    Args:
+        chunks: チャンクの辞書リスト（"text"キー必須、その他はメタデータとして保存）
+
+    Returns:
+        tuple[list[str], int]: (入力チャンクと同順のチャンクIDリスト, 新規に追加したチャンク数)
+    """
+    if not chunks:
+        return [], 0
+
+    client = _get_client()
+    collection = client.get_or_create_collection(
+        name=COLLECTION_NAME,
+        metadata=HNSW_METADATA,
+    )
+
+    # バッチ内の重複を除き、テキストのハッシュ値をIDとする（先に出現したものを採用）
+    chunk_ids = [_chunk_id(chunk["text"]) for chunk in chunks]
+    unique_chunks: dict[str, dict[str, str]] = {}
+    for chunk_id, chunk in zip(chunk_ids, chunks):
+        unique_chunks.setdefault(chunk_id, chunk)
+    ids = list(unique_chunks)
+
+    # コレクションに登録済みのIDは、メタデータのみ今回の入力で更新する
+    # （ファイル名の変更等で古いソース名が根拠として表示されるのを防ぐ）
+    existing = set(collection.get(ids=ids, include=[])["ids"])
+    max_batch = client.get_max_batch_size()
+    existing_ids = [i for i in ids if i in existing]
+    for start in range(0, len(existing_ids), max_batch):
+        batch_ids = existing_ids[start:start + max_batch]
+        collection.update(
+            ids=batch_ids,
+            metadatas=[_chunk_metadata(unique_chunks[i]) for i in batch_ids],
+        )
+
+    ids = [i for i in ids if i not in existing]
+    if not ids:
+        return chunk_ids, 0
+
+    texts = [unique_chunks[i]["text"] for i in ids]
+    metadatas = [_chunk_metadata(unique_chunks[i]) for i in ids]
+
+    # バッチ内のテキストを一括でベクトル化（正規化済みのためコサイン類似度は内積と等価）
+    embeddings = _get_embedder().encode(
+        texts,
+        batch_size=ENCODE_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+
+    # ChromaDBの1回あたりの登録上限を超えない範囲でまとめて登録
+    for start in range(0, len(texts), max_batch):
+        end = start + max_batch
+        collection.add(
+            ids=ids[start:end],
+            embeddings=embeddings[start:end].tolist(),
+            metadatas=metadatas[start:end],
+            documents=texts[start:end],
+        )
+
+    # 検索用の索引を次回検索時に読み直させる
+    _clear_ingest_state()
+    _load_index.clear()
+    _load_bm25.clear()
+    return chunk_ids, len(texts)
+
+
+def prune_collection(keep_ids: set[str]) -> int:
+    """
+    指定したID以外のチャンクをコレクションから削除する。
+    ロード完了後に、今回の入力に含まれないチャンクを取り除くために使用する。
+
+    Args:
+        keep_ids: 残すチャンクIDの集合
+
+    Returns:
+        int: 削除したチャンク数
+    """
+    try:
+        collection = _get_client().get_collection(COLLECTION_NAME)
+    except Exception:
+        return 0
+
+    stale_ids = [i for i in collection.get(include=[])["ids"] if i not in keep_ids]
+    if not stale_ids:
+        return 0
+
+    max_batch = _get_client().get_max_batch_size()
+    for start in range(0, len(stale_ids), max_batch):
+        collection.delete(ids=stale_ids[start:start + max_batch])
+
+    _clear_ingest_state()
+    _load_index.clear()
+    _load_bm25.clear()
+    return len(stale_ids)
+
+
+def _chunk_id(text: str) -> str:
+    """
+    チャンクテキストから重複判定用のIDを生成する。
+
+    Args:
+        text: チャンクテキスト
+
+    Returns:
+        str: 32桁の16進ハッシュ文字列
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _chunk_metadata(chunk: dict[str, str]) -> dict[str, str]:
+    """
+    チャンクの辞書から、ChromaDBに保存するメタデータ（テキスト以外の項目）を取り出す。
+
+    Args:
+        chunk: チャンクの辞書
+
+    Returns:
+        dict[str, str]: メタデータの辞書
+    """
+    return {k: v for k, v in chunk.items() if k != "text"}
+
+
+# ==============================================================================
+# 検索
+# ==============================================================================
+
+def query_collection(query: str, n_results: int = 5) -> list[dict]:
+    """
+    質問文に関連するチャンクをコレクションから検索する。
+
+    ベクトル検索とBM25キーワード検索をそれぞれ実行し、
+    Reciprocal Rank Fusion（RRF）で順位を統合する。
+
+    Args:
+        query: 検索クエリ（ユーザーの質問）
+        n_results: 取得する件数
+
+    Returns:
+        list[dict]: 関連チャンクのリスト（統合順位の高い順）
+                   {"id": チャンクID, "text": チャンクテキスト,
+                    "source": ソース情報, "score": ベクトル類似度}
+    """
+    info = get_collection_info()
+    if info is None or info["count"] == 0:
+        return []
+
+    query_embedding = _get_embedder().encode(
+        query,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    ).astype(np.float32)
+    k = min(n_results, info["count"])
+    pool = min(max(k, HYBRID_CANDIDATES), info["count"])
+
+    # 方式の使い分けはモジュール冒頭の「ベクトル検索の方式」を参照
+    if info["count"] >= HNSW_MIN_CHUNKS:
+        vector_ids = _query_hnsw(query_embedding, pool)
+    else:
+        vector_ids = _query_exact(query_embedding, pool)
+    keyword_ids = _query_bm25(query, pool)
+
+    fused_ids = _reciprocal_rank_fusion([vector_ids, keyword_ids])[:k]
+
+    # 本文・ソース情報は最終的な上位k件のみIDで取得する
+    chunks_by_id = _fetch_chunks(fused_ids, query_embedding)
+    return [chunks_by_id[i] for i in fused_ids if i in chunks_by_id]
+
+
+def _query_exact(query_embedding: np.ndarray, k: int) -> list[str]:
+    """
+    メモリ上の量子化済み行列を全件走査して上位k件を取得する。
+
+    Args:
+        query_embedding: (d,) float32の正規化済みクエリベクトル
+        k: 取得する件数
+
+    Returns:
+        list[str]: チャンクIDのリスト（類似度の高い順）
+    """
+    index = _load_index()
+    if index is None:
+        return []
+
+    # 全チャンクとの類似度を行列ベクトル積で計算
+    scores = _score(index["codes"], index["scales"], query_embedding)
+
+    return [index["ids"][i] for i in _top_k_indices(scores, k)]
+
+
+def _query_hnsw(query_embedding: np.ndarray, k: int) -> list[str]:
+    """
+    ChromaDBのHNSW索引で近似的に上位k件を取得する。
+
+    Args:
+        query_embedding: (d,) float32の正規化済みクエリベクトル
+        k: 取得する件数
+
+    Returns:
+        list[str]: チャンクIDのリスト（類似度の高い順）
+    """
+    collection = _get_client().get_collection(COLLECTION_NAME)
+    results = collection.query(
+        query_embeddings=[query_embedding.tolist()],
+        n_results=k,
+        include=["distances"],
+    )
+    return results["ids"][0]
+
+
+def _query_bm25(query: str, k: int) -> list[str]:
+    """
+    BM25でキーワード検索し、スコアの高い上位k件のチャンクIDを取得する。
+
+    Args:
+        query: 検索クエリ
+        k: 取得する件数
+
+    Returns:
+        list[str]: チャンクIDのリスト（スコアの高い順）。一致語のないチャンクは含まない。
+    """
+    index = _load_bm25()
+    if index is None:
+        return []
+
+    scores = _bm25_scores(index, _tokenize(query))
+
+    return [index["ids"][i] for i in _top_k_indices(scores, k) if scores[i] > 0]
+
+
+def _fetch_chunks(ids: list[str], query_embedding: np.ndarray) -> dict[str, dict]:
+    """
+    指定IDのチャンクをコレクションから取得し、クエリとの類似度を付与する。
+
+    Args:
+        ids: 取得するチャンクIDのリスト
+        query_embedding: (d,) float32の正規化済みクエリベクトル
+
+    Returns:
+        dict[str, dict]: チャンクIDをキーとする関連チャンクの辞書
+    """
+    # 空のidsを get() に渡すとバージョンによってはエラーや全件取得になるため、ここで打ち切る
+    if not ids:
+        return {}
+
+    collection = _get_client().get_collection(COLLECTION_NAME)
+    data = collection.get(ids=ids, include=["embeddings", "documents", "metadatas"])
+    scores = np.asarray(data["embeddings"], dtype=np.float32) @ query_embedding
+
+    chunks = {}
+    for chunk_id, text, metadata, score in zip(
+        data["ids"], data["documents"], data["metadatas"], scores
+    ):
+        chunks[chunk_id] = {
+            "id": chunk_id,
+            "text": text,
+            "source": (metadata or {}).get("source", "不明"),
+            "score": float(score),
+        }
+
+    return chunks
+
+
+def _reciprocal_rank_fusion(rankings: list[list[str]]) -> list[str]:
+    """
+    複数の順位リストをReciprocal Rank Fusionで1つに統合する。
+    各リストでの順位rに対して 1 / (RRF_K + r) を合計したスコアで並べる。
+
+    Args:
+        rankings: チャンクIDの順位リスト（それぞれ上位から順）のリスト
+
+    Returns:
+        list[str]: 統合スコアの高い順に並べたチャンクID
+    """
+    fused: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+
+    return sorted(fused, key=fused.get, reverse=True)
+
+
+def _tokenize(text: str) -> list[str]:
+    """
+    BM25用にテキストをトークン化する。
+    英数字は単語単位、日本語など分かち書きされない文字列は文字bigram単位に分割する。
+
+    Args:
+        text: トークン化対象のテキスト
+
+    Returns:
+        list[str]: トークンのリスト
+    """
+    tokens: list[str] = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if run.isascii() or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+# ==============================================================================
+# コレクション管理ユーティリティ
+# ==============================================================================
+
+def collection_exists() -> bool:
+    """
+    コレクションが存在するかどうかを確認する。
+
+    Returns:
+        bool: 存在すればTrue
+    """
+    try:
+        _get_client().get_collection(COLLECTION_NAME)
+        return True
+    except Exception:
+        return False
+
+
+def get_collection_info() -> Optional[dict]:
+    """
+    コレクションの情報を取得する。
+
+    Returns:
+        Optional[dict]: {"name": コレクション名, "count": チャンク数}。
+                        存在しない場合はNone。
+    """
+    try:
+        collection = _get_client().get_collection(COLLECTION_NAME)
+        return {"name": COLLECTION_NAME, "count": collection.count()}
+    except Exception:
+        return None
+
+
+def delete_collection() -> None:
+    """コレクションを削除する。存在しない場合は何もしない。"""
+    try:
+        _get_client().delete_collection(COLLECTION_NAME)
+    except Exception:
+        # コレクションが存在しない場合
+        pass
+    _clear_ingest_state()
+    _load_index.clear()
+    _load_bm25.clear()
+
+
+def _clear_ingest_state() -> None:
+    """コレクションの内容が変わったため、保存済みの入力ハッシュを無効にする。"""
+    if os.path.exists(INGEST_STATE_PATH):
+        os.remove(INGEST_STATE_PATH)
+
+
+def mark_ingested(content_hash: str, summary: dict) -> None:
+    """
+    現在のコレクションに登録したドキュメントの入力ハッシュとサマリーを保存する。
+    登録が完了した後に呼び出す。
+
+    Args:
+        content_hash: 入力ドキュメント全体のハッシュ値
+        summary: ドキュメントのサマリー情報
+    """
+    with open(INGEST_STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"content_hash": content_hash, "summary": summary}, f, ensure_ascii=False)
+
+
+def get_ingested_summary(content_hash: str) -> Optional[dict]:
+    """
+    同じ入力のドキュメントが登録済みであれば、そのサマリーを取得する。
+
+    Args:
+        content_hash: 入力ドキュメント全体のハッシュ値
+
+    Returns:
+        Optional[dict]: 登録済みの場合はサマリー情報。未登録・入力が異なる場合はNone。
+    """
+    try:
+        with open(INGEST_STATE_PATH, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if state.get("content_hash") != content_hash:
+        return None
+
+    info = get_collection_info()
+    if info is None or info["count"] == 0:
+        return None
+
+    return state.get("summary")